@@ -2,18 +2,25 @@
 iTunes Feed Generator for Pelican.
 """
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import hashlib
+import html
+import itertools
 import logging
 import os
+import re
+from xml.sax.saxutils import escape, quoteattr
 
 from feedgenerator import Rss201rev2Feed
+from feedgenerator.django.utils.encoding import iri_to_uri
 from feedgenerator.django.utils.feedgenerator import rfc2822_date
-from jinja2 import Markup
 import mutagen
-import six
 
 from pelican import signals
+from pelican.cache import FileDataCacher
 from pelican.generators import Generator
-from pelican.utils import set_date_tzinfo
+from pelican.utils import is_selected_for_writing, set_date_tzinfo
 from pelican.writers import Writer
 
 logger = logging.getLogger(__name__)
@@ -33,14 +40,174 @@ ITEM_ELEMENTS = (
 )
 DEFAULT_ITEM_ELEMENTS = {k: None for k in ITEM_ELEMENTS}
 
-SUPPORTED_MIME_TYPES = [
-    "audio/x-m4a",
-    "audio/mpeg",
-    "video/quicktime",
-    "video/mp4",
-    "video/x-m4v",
-    "application/pdf ",
-]
+SUPPORTED_MIME_TYPES = frozenset(
+    [
+        "audio/x-m4a",
+        "audio/mpeg",
+        "video/quicktime",
+        "video/mp4",
+        "video/x-m4v",
+        "application/pdf ",
+    ]
+)
+
+# Channel elements added from settings: (element name, setting, attribute),
+# the setting's value is the element's content when attribute is None.
+_SETTINGS_MAP = (
+    ("itunes:author", "PODCAST_FEED_AUTHOR", None),
+    ("itunes:explicit", "PODCAST_FEED_EXPLICIT", None),
+    ("itunes:subtitle", "PODCAST_FEED_SUBTITLE", None),
+    ("itunes:summary", "PODCAST_FEED_SUMMARY", None),
+    ("language", "PODCAST_FEED_LANGUAGE", None),
+    ("copyright", "PODCAST_FEED_COPYRIGHT", None),
+    ("itunes:image", "PODCAST_FEED_IMAGE", "href"),
+)
+
+# Standard feedgenerator item keys which PodcastFeed.append_item does not fill
+# from the podcast item, see SyndicationFeed.add_item.
+_FEEDGENERATOR_ITEM = {
+    "content": None,
+    "author_email": None,
+    "author_link": None,
+    "updateddate": None,
+    "comments": None,
+    "unique_id_is_permalink": None,
+    "enclosures": (),
+    "categories": (),
+    "item_copyright": None,
+    "ttl": None,
+}
+
+# Settings which are all required to add the itunes:owner element.
+_OWNER_KEYS = frozenset(["PODCAST_FEED_OWNER_NAME", "PODCAST_FEED_OWNER_EMAIL"])
+
+METADATA_CACHE_NAME = "podcast_meta.cache"
+FEED_HASH_CACHE_NAME = "podcast_feed.cache"
+
+# Number of threads parsing attachment files with mutagen.
+METADATA_WORKERS = 8
+
+# Settings besides PODCAST_FEED_* which change the content of the feed. Only
+# plain values go in the feed hash, so it is the same in every build.
+_FEED_SETTINGS = frozenset(
+    [
+        "SITEURL",
+        "SITENAME",
+        "PATH",
+        "TIMEZONE",
+        "FEED_MAX_ITEMS",
+        "ARTICLE_URL",
+        "ARTICLE_LANG_URL",
+    ]
+)
+
+
+_STRIPTAGS = re.compile(r"<!--.*?-->|<[^>]+>", re.DOTALL)
+
+
+def _striptags(value):
+    """Removes tags and comments from ``value``, collapses whitespace and
+    unescapes entities, like jinja2's ``Markup.striptags``."""
+    return html.unescape(" ".join(_STRIPTAGS.sub("", value).split()))
+
+
+def _stat(filepath):
+    """Returns ``os.stat(filepath)``, or None if the file does not exist."""
+    try:
+        return os.stat(filepath)
+    except (OSError, TypeError):
+        return None
+
+
+def _read_attachment_metadata(filepath, stat):
+    """Returns the (mtime, size) stamp of a local attachment and its length,
+    mime type and duration read with mutagen.
+
+    :param filepath: path to the attachment file.
+    :param stat: the ``os.stat`` result of the attachment file.
+    """
+    audiofile = mutagen.File(filepath)
+    mime_type = next((m for m in audiofile.mime if m in SUPPORTED_MIME_TYPES), None)
+    if mime_type is None:
+        # an enclosure without type is invalid RSS, do not publish it.
+        raise ValueError(
+            f"Unsupported mime type {audiofile.mime} of podcast attachment {filepath}"
+        )
+    metadata = {
+        "length": str(stat.st_size),
+        "type": mime_type,
+        "duration": str(int(audiofile.info.length)),
+    }
+    return (stat.st_mtime_ns, stat.st_size), metadata
+
+
+# Functions building the value of each item element from an article, they are
+# called with the iTunesWriter instance, the article and the article's
+# attribute dict (``vars(item)``) used to check optional metadata.
+def _item_link(writer, item, attrs):
+    return f"{writer._url_prefix}{item.url}"
+
+
+def _item_title(writer, item, attrs):
+    return _striptags(item.title)
+
+
+def _item_summary(writer, item, attrs):
+    if "description" in attrs:
+        return item.description
+    return _striptags(item.summary)
+
+
+def _item_description(writer, item, attrs):
+    summary = item.summary.replace("<html><body>", "")
+    # "]]>" would end the CDATA section early, split it over two sections.
+    summary = summary.replace("]]>", "]]]]><![CDATA[>")
+    return f"<![CDATA[{summary}]]>"
+
+
+@functools.lru_cache(maxsize=4096)
+def _localize_pubdate(date, tzinfo, timezone):
+    """Returns ``date`` in ``timezone`` and its RFC 2822 string.
+
+    ``tzinfo`` is part of the cache key only: aware datetimes in different
+    timezones compare equal when they are the same instant, but do not format
+    the same.
+    """
+    date = set_date_tzinfo(date, timezone)
+    return date, rfc2822_date(date)
+
+
+def _item_author(writer, item, attrs):
+    if "author" in attrs:
+        return item.author.name
+
+
+def _item_subtitle(writer, item, attrs):
+    if "subtitle" in attrs:
+        return _striptags(item.subtitle)
+
+
+def _item_image(writer, item, attrs):
+    if "image" in attrs:
+        return {"href": f"{writer.site_url}{item.image}"}
+
+
+def _item_guid(writer, item, attrs):
+    # falls back to the item's link, see iTunesWriter._add_item_to_the_feed.
+    if "guid" in attrs:
+        return item.guid
+
+
+_ARTICLE_VALUE_MAP = (
+    ("link", _item_link),
+    ("title", _item_title),
+    ("itunes:summary", _item_summary),
+    ("description", _item_description),
+    ("itunes:author", _item_author),
+    ("itunes:subtitle", _item_subtitle),
+    ("itunes:image", _item_image),
+    ("guid", _item_guid),
+)
 
 
 class PodcastFeed(Rss201rev2Feed):
@@ -68,37 +235,21 @@ class PodcastFeed(Rss201rev2Feed):
         """
         super(PodcastFeed, self).add_root_elements(handler)
 
-        def add_element(handler, *args):
-            if len(args) == 2:
-                args = args + (None,)
-            element_name, _key, attr = args
-            if _key in self.settings:
-                if attr is None:
-                    handler.addQuickElement(element_name, self.settings[_key])
-                else:
-                    handler.addQuickElement(
-                        element_name, attrs={attr: self.settings[_key]}
-                    )
-
-        settings_map = [
-            ["itunes:author", "PODCAST_FEED_AUTHOR"],
-            ["itunes:explicit", "PODCAST_FEED_EXPLICIT"],
-            ["itunes:subtitle", "PODCAST_FEED_SUBTITLE"],
-            ["itunes:summary", "PODCAST_FEED_SUMMARY"],
-            ["language", "PODCAST_FEED_LANGUAGE"],
-            ["copyright", "PODCAST_FEED_COPYRIGHT"],
-            ["itunes:image", "PODCAST_FEED_IMAGE", "href"],
-        ]
-
-        for setting_map in settings_map:
-            add_element(handler, *setting_map)
+        for element_name, key, attr in _SETTINGS_MAP:
+            value = self.settings.get(key)
+            if value is None:
+                continue
+            if attr is None:
+                handler.addQuickElement(element_name, value)
+            else:
+                handler.addQuickElement(element_name, attrs={attr: value})
 
         # Adds a feed owner root tag an some child tags. Ex:
         #  <itunes:owner>
         #    <itunes:name>John Doe</itunes:name>
         #    <itunes:email>john.doe@example.com</itunes:email>
         #  </itunes:owner>
-        if "PODCAST_FEED_OWNER_NAME" and "PODCAST_FEED_OWNER_EMAIL" in self.settings:
+        if _OWNER_KEYS <= self.settings.keys():
             handler.startElement("itunes:owner", {})
             handler.addQuickElement(
                 "itunes:name", self.settings["PODCAST_FEED_OWNER_NAME"]
@@ -113,30 +264,57 @@ class PodcastFeed(Rss201rev2Feed):
         #   <itunes:category text="Gadgets"/>
         #  </itunes:category>
         if "PODCAST_FEED_CATEGORY" in self.settings:
-
-            def category_element(categories, is_top=True):
-                if isinstance(categories, str):
-                    return handler.addQuickElement(
-                        "itunes:category", attrs={"text": categories}
-                    )
-                elif isinstance(categories, Iterable):
-                    if len(categories) <= 0:
-                        return
-                    category = categories.pop(0)
-                    if is_top and len(categories) > 0:
+            categories = self.settings["PODCAST_FEED_CATEGORY"]
+            if isinstance(categories, str):
+                handler.addQuickElement("itunes:category", attrs={"text": categories})
+            elif isinstance(categories, Iterable):
+                categories = list(categories)
+                for i, category in enumerate(categories):
+                    if i == 0 and len(categories) > 1:
                         handler.startElement(
                             "itunes:category", attrs={"text": category}
                         )
-                        _ = category_element(categories, is_top=False)
-                        handler.endElement("itunes:category")
                     else:
                         handler.addQuickElement(
                             "itunes:category", attrs={"text": category}
                         )
-                        _ = category_element(categories, is_top=False)
+                if len(categories) > 1:
+                    handler.endElement("itunes:category")
 
-            categories = self.settings["PODCAST_FEED_CATEGORY"]
-            category_element(categories)
+    def append_item(self, item, pubdate=None):
+        """Adds an item to the feed without the per-field conversions of
+        ``add_item``.
+
+        The standard feedgenerator keys are filled in as well, so
+        ``latest_post_date`` and plugins reading ``feed.items`` from the
+        feed signals keep working.
+
+        :param item: The dict generated by iTunesWriter._add_item_to_the_feed
+        :param pubdate: The item's publication date as a datetime.
+        """
+        item["link"] = iri_to_uri(item["link"])
+        self.items.append(
+            {
+                **_FEEDGENERATOR_ITEM,
+                "author_name": item["itunes:author"],
+                "pubdate": pubdate,
+                "unique_id": item["guid"],
+                **item,
+            }
+        )
+
+    def write_items(self, handler):
+        """Streams every item to the output as a pre-rendered string instead
+        of building it element by element through ``handler``.
+
+        :param handler: A SimplerXMLGenerator instance.
+        """
+        # close a start tag left open by the last root element, if any.
+        handler._finish_pending_start_element()
+        for item in self.items:
+            handler._write("<item>")
+            self.add_item_elements(handler, item)
+            handler._write("</item>")
 
     def add_item_elements(self, handler, item):
         """Adds a new element to the iTunes feed, using information from
@@ -146,22 +324,25 @@ class PodcastFeed(Rss201rev2Feed):
         :param item: The dict generated by iTunesWriter._add_item_to_the_feed
 
         """
+        elements = []
         for key in DEFAULT_ITEM_ELEMENTS:
             # empty attributes will be ignored.
             if item[key] is None:
                 continue
             if key == "description":
-                content = item[key]
-                handler.startElement("description", {})
-                if not isinstance(content, six.text_type):
-                    content = six.text_type(content, handler._encoding)
-                content = content.replace("<html><body>", "")
-                handler._write(content)
-                handler.endElement("description")
-            elif isinstance(item[key], six.text_type):
-                handler.addQuickElement(key, item[key])
+                # already wrapped in CDATA by iTunesWriter, no escaping needed.
+                elements.append(f"<description>{item[key]}</description>")
+            elif isinstance(item[key], str):
+                # saxutils.escape's three str.replace calls run in C and beat
+                # a str.translate table, which maps one character at a time.
+                elements.append(f"<{key}>{escape(item[key])}</{key}>")
             elif type(item[key]) is dict:
-                handler.addQuickElement(key, attrs=item[key])
+                attrs = "".join(
+                    f" {name}={quoteattr(value)}"
+                    for name, value in sorted(item[key].items())
+                )
+                elements.append(f"<{key}{attrs}/>")
+        handler._write("".join(elements))
 
 
 class iTunesWriter(Writer):
@@ -169,17 +350,193 @@ class iTunesWriter(Writer):
     invoking the PodcastFeed and writing the feed itself (using it's superclass
     methods)."""
 
+    def __init__(self, *args, **kwargs):
+        super(iTunesWriter, self).__init__(*args, **kwargs)
+        # Attachment metadata (length, mime type, duration) survives between
+        # builds so unchanged files are not parsed by mutagen again.
+        self.metadata_cache = FileDataCacher(
+            self.settings,
+            METADATA_CACHE_NAME,
+            self.settings["CACHE_CONTENT"],
+            self.settings["LOAD_CONTENT_CACHE"],
+        )
+        self._siteurl = self.settings.get("SITEURL") or ""
+        self._siteurl_len = len(self._siteurl)
+        self._content_path = self.settings.get("PATH")
+        # metadata of the local attachments of the feed being written, by path.
+        self._attachments = {}
+        # Hash of the settings and episodes each feed was last written with.
+        self.feed_hash_cache = FileDataCacher(
+            self.settings,
+            FEED_HASH_CACHE_NAME,
+            self.settings["CACHE_CONTENT"],
+            self.settings["LOAD_CONTENT_CACHE"],
+        )
+
+    def write_feed(self, elements, context, path=None, *args, **kwargs):
+        """Writes the feed and saves the attachment metadata cache.
+
+        The feed is not generated at all when the feed at ``path`` was
+        written with the same settings and episodes, and is newer than every
+        episode's source and attachment file.
+        """
+        if not is_selected_for_writing(self.settings, path):
+            return None
+
+        episodes = elements
+        max_items = self.settings.get("FEED_MAX_ITEMS")
+        if max_items:
+            episodes = elements[:max_items]
+
+        stats = self._stat_attachments(episodes)
+        feed_hash = self._feed_hash(episodes)
+        if path and self._is_feed_up_to_date(episodes, stats, path, feed_hash):
+            logger.info("Skipping %s, no podcast episode changed", path)
+            return None
+
+        self._prefetch_attachment_metadata(stats)
+        feed = super(iTunesWriter, self).write_feed(
+            elements, context, path, *args, **kwargs
+        )
+        self.metadata_cache.save_cache()
+        if path:
+            self.feed_hash_cache.cache_data(path, feed_hash)
+            self.feed_hash_cache.save_cache()
+        return feed
+
+    def _feed_hash(self, elements):
+        """Returns a digest of the settings and the episode list the feed is
+        generated from.
+
+        :param elements: the articles to put on the feed.
+        """
+        settings = sorted(
+            (key, value)
+            for key, value in self.settings.items()
+            if key.startswith("PODCAST_FEED_") or key in _FEED_SETTINGS
+        )
+        sources = [article.source_path for article in elements]
+        return hashlib.sha256(repr((settings, sources)).encode()).hexdigest()
+
+    def _is_feed_up_to_date(self, elements, stats, path, feed_hash):
+        """Returns True if the feed at ``path`` was written with ``feed_hash``
+        and is newer than the plugin and every episode's source and local
+        attachment file.
+
+        :param elements: the articles to put on the feed.
+        :param stats: the ``os.stat`` results of the local attachments.
+        :param path: the path to output.
+        :param feed_hash: the digest returned by ``_feed_hash``.
+        """
+        if self.feed_hash_cache.get_cached_data(path) != feed_hash:
+            return False
+
+        output_stat = _stat(os.path.join(self.output_path, path))
+        if output_stat is None:
+            return False
+
+        sources = [_stat(__file__)]
+        sources.extend(_stat(article.source_path) for article in elements)
+        return all(
+            stat is not None and stat.st_mtime_ns < output_stat.st_mtime_ns
+            for stat in itertools.chain(sources, stats.values())
+        )
+
+    def _resolve_attachment(self, podcast_url):
+        """Returns the url of a podcast attachment and its local file path,
+        the file path is None when the attachment is not under SITEURL.
+
+        :param podcast_url: the article's ``podcast`` metadata.
+        """
+        if podcast_url.startswith(self._siteurl):
+            filepath = f"{self._content_path}/{podcast_url[self._siteurl_len:]}"
+            return podcast_url, filepath
+        return podcast_url, None
+
+    def _get_cached_metadata(self, filepath, stat):
+        """Returns the cached length, mime type and duration of a local
+        attachment, or None when the file's mtime or size changed since.
+
+        :param filepath: path to the attachment file.
+        :param stat: the ``os.stat`` result of the attachment file.
+        """
+        cached = self.metadata_cache.get_cached_data(filepath)
+        if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+
+    def _get_attachment_metadata(self, filepath, stat):
+        """Returns the length, mime type and duration of a local attachment.
+
+        Cached values are used as long as the file's mtime and size did not
+        change, otherwise the file is parsed with mutagen.
+
+        :param filepath: path to the attachment file.
+        :param stat: the ``os.stat`` result of the attachment file.
+        """
+        metadata = self._get_cached_metadata(filepath, stat)
+        if metadata is None:
+            stamp, metadata = _read_attachment_metadata(filepath, stat)
+            self.metadata_cache.cache_data(filepath, (stamp, metadata))
+        return metadata
+
+    def _stat_attachments(self, elements):
+        """Returns the ``os.stat`` results of the local attachments of
+        ``elements`` by file path, attachments which are not local files are
+        left out.
+
+        :param elements: the articles to put on the feed.
+        """
+        stats = {}
+        for article in elements:
+            _, filepath = self._resolve_attachment(article.podcast)
+            if filepath is None or filepath in stats:
+                continue
+            stat = _stat(filepath)
+            if stat is not None:
+                stats[filepath] = stat
+        return stats
+
+    def _prefetch_attachment_metadata(self, stats):
+        """Collects the metadata of the local attachments in ``stats``,
+        parsing the ones missing from the metadata cache in parallel, so
+        ``_add_item_to_the_feed`` neither stats nor parses any file.
+
+        :param stats: the ``os.stat`` results of the local attachments.
+        """
+        self._attachments = {}
+        filepaths = []
+        for filepath, stat in stats.items():
+            metadata = self._get_cached_metadata(filepath, stat)
+            if metadata is None:
+                filepaths.append(filepath)
+            else:
+                self._attachments[filepath] = metadata
+        if not filepaths:
+            return
+
+        with ThreadPoolExecutor(max_workers=METADATA_WORKERS) as executor:
+            results = executor.map(
+                _read_attachment_metadata,
+                filepaths,
+                [stats[filepath] for filepath in filepaths],
+            )
+            for filepath, (stamp, metadata) in zip(filepaths, results):
+                self.metadata_cache.cache_data(filepath, (stamp, metadata))
+                self._attachments[filepath] = metadata
+
     def _create_new_feed(self, *args):
         """Helper function (called by the super class) which will initialize
         the PodcastFeed object."""
         self.context = args[-1]
+        # prefix of every item link, site_url is set by write_feed.
+        self._url_prefix = f"{self.site_url}/"
 
         description = self.settings.get("PODCAST_FEED_SUMMARY", "")
         title = self.settings.get("PODCAST_FEED_TITLE", "") or self.context["SITENAME"]
 
         feed = PodcastFeed(
             title=title,
-            link=("{0}/".format(self.site_url)),
+            link=self._url_prefix,
             feed_url=None,
             description=description,
             settings=self.settings,
@@ -198,106 +555,45 @@ class iTunesWriter(Writer):
 
         """
         # Local copy of iTunes attributes to add to the feed.
-        article = DEFAULT_ITEM_ELEMENTS.copy()
-
-        article_values_map = [
-            [
-                "link",
-                lambda calee, item, article: "{0}/{1}".format(calee.site_url, item.url),
-            ],
-            [
-                "title",
-                lambda calee, item, article: Markup(item.title).striptags(),
-            ],  # NOQA E231
-            [
-                "itunes:summary",
-                lambda calee, item, article: item.description
-                if hasattr(item, "description")
-                else Markup(item.summary).striptags(),
-            ],
-            [
-                "description",
-                lambda calee, item, article: "<![CDATA[{}]]>".format(
-                    Markup(item.summary)
-                ),
-            ],
-            [
-                "pubDate",
-                lambda calee, item, article: rfc2822_date(
-                    set_date_tzinfo(
-                        item.modified if hasattr(item, "modified") else item.date,
-                        self.settings.get("TIMEZONE", None),
-                    )
-                ),
-            ],
-            ["itunes:author", lambda calee, item, article: item.author.name],
-            [
-                "itunes:subtitle",
-                lambda calee, item, article: Markup(item.subtitle).striptags()
-                if hasattr(item, "subtitle")
-                else None,
-            ],
-            [
-                "itunes:image",
-                lambda calee, item, article: {
-                    "href": "{0}{1}".format(self.site_url, item.image)
-                }
-                if hasattr(item, "image")
-                else None,
-            ],
-            [
-                "guid",
-                lambda calee, item, article: item.guid
-                if hasattr(item, "guid")
-                else article["link"],
-            ],
-        ]
-
-        def update_article(item, article, *args):
-            if len(args) == 2:
-                args = args + (None,)
-            _key, value, default = args
-            try:
-                val = value(self, item, article)
-                if val:
-                    article[_key] = val
-            except Exception as e:
-                logger.warning("Exception %s", e)
-
-        for article_value_map in article_values_map:
-            update_article(item, article, *article_value_map)
-
-        # get file path to podcast attachment file.
-        def get_attachment_filepath(settings):
-            siteurl = self.settings.get("SITEURL", None)
-            content_path = self.settings.get("PATH", None)
-            if item.podcast.startswith(siteurl):
-                return f"{content_path}/{item.podcast[len(siteurl):]}"
-
-        def get_attachment_url(settings):
-            return item.podcast
-
-        enclosure = {"url": get_attachment_url(self.settings)}
-
-        if hasattr(item, "length"):
-            enclosure["length"] = item.length
-        if hasattr(item, "duration"):
-            article["itunes:duration"] = item.duration
+        article = dict.fromkeys(ITEM_ELEMENTS)
+        attrs = vars(item)
 
-        filepath = get_attachment_filepath(self.settings)
+        for key, value in _ARTICLE_VALUE_MAP:
+            val = value(self, item, attrs)
+            if val:
+                article[key] = val
 
-        if filepath and os.path.exists(filepath):
-            enclosure["length"] = str(os.path.getsize(filepath))
-            audiofile = mutagen.File(filepath)
+        if article["guid"] is None:
+            article["guid"] = article["link"]
 
-            (enclosure["type"],) = set(audiofile.mime) & set(SUPPORTED_MIME_TYPES)
+        date = item.modified if "modified" in attrs else item.date
+        pubdate, article["pubDate"] = _localize_pubdate(
+            date, date.tzinfo, self.settings.get("TIMEZONE", None)
+        )
+
+        url, filepath = self._resolve_attachment(item.podcast)
+        enclosure = {"url": url}
+
+        if "length" in attrs:
+            enclosure["length"] = item.length
+        if "duration" in attrs:
+            article["itunes:duration"] = item.duration
 
-            article["itunes:duration"] = str(int(audiofile.info.length))
+        metadata = self._attachments.get(filepath)
+        if metadata is None and filepath is not None:
+            # not prefetched, e.g. when called outside of write_feed.
+            stat = _stat(filepath)
+            if stat is not None:
+                metadata = self._get_attachment_metadata(filepath, stat)
+        if metadata is not None:
+            enclosure["length"] = metadata["length"]
+            enclosure["type"] = metadata["type"]
+            article["itunes:duration"] = metadata["duration"]
 
         article["enclosure"] = enclosure
 
         # Add the new article to the feed.
-        feed.add_item(**article)
+        feed.append_item(article, pubdate)
 
 
 class PodcastFeedGenerator(Generator):
@@ -316,10 +612,12 @@ class PodcastFeedGenerator(Generator):
         """Looks for all 'published' articles and add them to the episodes
         list."""
         if self.feed_path:
-            for article in self.context["articles"]:
-                # Only 'published' articles with the 'podcast' metatag.
-                if article.status == "published" and hasattr(article, "podcast"):
-                    self.episodes.append(article)
+            # Only 'published' articles with the 'podcast' metatag.
+            self.episodes = [
+                article
+                for article in self.context["articles"]
+                if article.status == "published" and "podcast" in vars(article)
+            ]
 
     def generate_output(self, writer):
         """Write out the iTunes feed to a file.
@@ -7,9 +7,10 @@ import unittest
 from unittest import mock
 from unittest.mock import MagicMock
 
-from pelican_podcast import PodcastFeedGenerator, iTunesWriter
+import mutagen
+from pelican_podcast import PodcastFeedGenerator, iTunesWriter, pelican_podcast
 
-from pelican.contents import Category
+from pelican.contents import Author, Category
 from pelican.tests.support import get_article, get_context, get_settings
 
 CUR_DIR = os.path.dirname(__file__)
@@ -100,6 +101,7 @@ class TestiTunesWriter(unittest.TestCase):
 
         settings = {}
         settings["CACHE_CONTENT"] = False
+        settings["CACHE_PATH"] = self.temp_cache
         settings["SITEURL"] = SITEURL
         settings["PATH"] = PATH
         settings["FEED_DOMAIN"] = SITEURL
@@ -187,6 +189,66 @@ class TestiTunesWriter(unittest.TestCase):
             )
             self.assertIn('length="960975"', output_containts)
             self.assertIn("<itunes:duration>60</itunes:duration>", output_containts)
+            assert (
+                output_containts.count(
+                    "<description><![CDATA[podcast cocntent]]></description>"
+                )
+                == 2
+            )
+
+    def test_generate_output_title_striptags(self):
+        generator = self.get_generator()
+        for article in generator.episodes:
+            article.title = "<em>podcast</em>  &amp; <!-- draft -->title"
+        generator.generate_output(None)
+
+        output_path = os.path.join(self.temp_output, self.settings["PODCAST_FEED_PATH"])
+        with open(output_path) as output_file:
+            output_containts = output_file.read()
+            assert output_containts.count("<title>podcast &amp; title</title>") == 2
+
+    def test_generate_output_description_cdata(self):
+        generator = self.get_generator()
+        for article in generator.episodes:
+            article.metadata["summary"] = "<p>links & notes</p> a[0]]>b"
+        generator.generate_output(None)
+
+        output_path = os.path.join(self.temp_output, self.settings["PODCAST_FEED_PATH"])
+        with open(output_path) as output_file:
+            output_containts = output_file.read()
+            self.assertIn(
+                "<description><![CDATA[<p>links & notes</p> a[0]]]]><![CDATA[>b]]>"
+                "</description>",
+                output_containts,
+            )
+
+    def test_generate_output_item_author(self):
+        generator = self.get_generator()
+        generator.episodes[0].author = Author("EPISODE AUTHOR", self.settings)
+        generator.generate_output(None)
+
+        output_path = os.path.join(self.temp_output, self.settings["PODCAST_FEED_PATH"])
+        with open(output_path) as output_file:
+            output_containts = output_file.read()
+            assert (
+                output_containts.count("<itunes:author>EPISODE AUTHOR</itunes:author>")
+                == 1
+            )
+
+    def test_write_feed_standard_item_keys(self):
+        generator = self.get_generator()
+        writer = iTunesWriter(self.temp_output, settings=self.settings)
+        feed = writer.write_feed(
+            generator.episodes, generator.context, self.settings["PODCAST_FEED_PATH"]
+        )
+
+        item = feed.items[0]
+        self.assertEqual(item["guid"], item["unique_id"])
+        self.assertIsInstance(item["pubdate"], datetime.datetime)
+        self.assertEqual((), item["categories"])
+        self.assertEqual(
+            max(item["pubdate"] for item in feed.items), feed.latest_post_date()
+        )
 
     def test_generate_output_podcast(self):
         generator = self.get_generator()
@@ -215,3 +277,133 @@ class TestiTunesWriter(unittest.TestCase):
                 output_containts,
             )
             assert output_containts.count("<title>A Pelican Blog</title>") == 1
+        self.assertEqual(["Leisure", "Hobbies"], self.settings["PODCAST_FEED_CATEGORY"])
+
+    def test_generate_output_metadata_cache(self):
+        self.settings["CACHE_CONTENT"] = True
+        self.settings["LOAD_CONTENT_CACHE"] = True
+        generator = self.get_generator()
+        generator.generate_output(None)
+
+        cache_path = os.path.join(self.temp_cache, "podcast_meta.cache")
+        self.assertTrue(os.path.exists(cache_path))
+
+        generator = self.get_generator()
+        with mock.patch("mutagen.File") as mutagen_file:
+            generator.generate_output(None)
+            self.assertFalse(mutagen_file.called)
+
+        output_path = os.path.join(self.temp_output, self.settings["PODCAST_FEED_PATH"])
+        with open(output_path) as output_file:
+            output_containts = output_file.read()
+            self.assertIn('length="960975"', output_containts)
+            self.assertIn("<itunes:duration>60</itunes:duration>", output_containts)
+
+    def test_generate_output_metadata_cache_disabled(self):
+        generator = self.get_generator()
+        generator.generate_output(None)
+
+        cache_path = os.path.join(self.temp_cache, "podcast_meta.cache")
+        self.assertFalse(os.path.exists(cache_path))
+
+    def test_generate_output_attachment_parsed_once(self):
+        generator = self.get_generator()
+        with mock.patch("mutagen.File", wraps=mutagen.File) as mutagen_file:
+            generator.generate_output(None)
+            self.assertEqual(1, mutagen_file.call_count)
+
+    def test_generate_output_attachment_stat_once(self):
+        generator = self.get_generator()
+        with mock.patch.object(
+            pelican_podcast, "_stat", wraps=pelican_podcast._stat
+        ) as stat:
+            generator.generate_output(None)
+        attachment_stats = [
+            call for call in stat.call_args_list if call[0][0].endswith("test.mp3")
+        ]
+        self.assertEqual(1, len(attachment_stats))
+
+    def test_generate_output_not_selected(self):
+        self.settings["CACHE_CONTENT"] = True
+        self.settings["WRITE_SELECTED"] = [os.path.join(self.temp_output, "index.html")]
+        generator = self.get_generator()
+        with mock.patch("mutagen.File") as mutagen_file:
+            generator.generate_output(None)
+            self.assertFalse(mutagen_file.called)
+
+        cache_path = os.path.join(self.temp_cache, "podcast_meta.cache")
+        self.assertFalse(os.path.exists(cache_path))
+
+    def test_generate_output_unsupported_mime_type(self):
+        generator = self.get_generator()
+        audiofile = MagicMock(mime=["audio/x-unknown"])
+        with mock.patch("mutagen.File", return_value=audiofile):
+            with self.assertRaisesRegex(ValueError, "audio/test.mp3"):
+                generator.generate_output(None)
+
+    def set_source_path(self, generator):
+        source_path = os.path.join(self.temp_content, "podcast.md")
+        open(source_path, "w").close()
+        an_hour_ago = datetime.datetime.now().timestamp() - 3600
+        os.utime(source_path, (an_hour_ago, an_hour_ago))
+        for article in generator.episodes:
+            article.source_path = source_path
+        return source_path
+
+    def test_generate_output_unchanged_feed(self):
+        self.settings["CACHE_CONTENT"] = True
+        self.settings["LOAD_CONTENT_CACHE"] = True
+        generator = self.get_generator()
+        source_path = self.set_source_path(generator)
+        generator.generate_output(None)
+
+        with mock.patch.object(iTunesWriter, "_add_item_to_the_feed") as add_item:
+            generator.generate_output(None)
+            self.assertFalse(add_item.called)
+
+        self.settings["ARTICLE_URL"] = "episodes/{slug}/"
+        with mock.patch.object(iTunesWriter, "_add_item_to_the_feed") as add_item:
+            generator.generate_output(None)
+            self.assertTrue(add_item.called)
+
+        an_hour_later = datetime.datetime.now().timestamp() + 3600
+        os.utime(source_path, (an_hour_later, an_hour_later))
+        with mock.patch.object(iTunesWriter, "_add_item_to_the_feed") as add_item:
+            generator.generate_output(None)
+            self.assertTrue(add_item.called)
+
+    def test_feed_hash_ignores_other_settings(self):
+        generator = self.get_generator()
+        writer = iTunesWriter(self.temp_output, settings=self.settings)
+        feed_hash = writer._feed_hash(generator.episodes)
+
+        # callables repr with their memory address, which differs per build.
+        self.settings["JINJA_FILTERS"] = {"upper": lambda value: value.upper()}
+        self.assertEqual(feed_hash, writer._feed_hash(generator.episodes))
+
+        self.settings["PODCAST_FEED_AUTHOR"] = "ANOTHER AUTHOR STRING"
+        self.assertNotEqual(feed_hash, writer._feed_hash(generator.episodes))
+
+    def test_generate_output_ignore_cache(self):
+        self.settings["CACHE_CONTENT"] = True
+        self.settings["LOAD_CONTENT_CACHE"] = True
+        generator = self.get_generator()
+        self.set_source_path(generator)
+        generator.generate_output(None)
+
+        # pelican --ignore-cache
+        self.settings["LOAD_CONTENT_CACHE"] = False
+        with mock.patch.object(iTunesWriter, "_add_item_to_the_feed") as add_item:
+            generator.generate_output(None)
+            self.assertTrue(add_item.called)
+
+    def test_generate_output_owner_requires_name_and_email(self):
+        del self.settings["PODCAST_FEED_OWNER_NAME"]
+        generator = self.get_generator()
+        generator.generate_output(None)
+
+        output_path = os.path.join(self.temp_output, self.settings["PODCAST_FEED_PATH"])
+        with open(output_path) as output_file:
+            output_containts = output_file.read()
+            self.assertNotIn("<itunes:owner>", output_containts)
+            self.assertNotIn("example@example.com", output_containts)